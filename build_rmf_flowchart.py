@@ -12,15 +12,26 @@ This creates a massive, production-ready diagram suitable for:
 - Confluence/Wiki documentation
 """
 
+import argparse
 import csv
+import os
+import shutil
+import subprocess
 import sys
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from itertools import groupby, starmap
+from operator import itemgetter
 from pathlib import Path
 from datetime import datetime
 
 INPUT_CSV = "controls_rev4.csv"
 OUTPUT_MMD = "BMC3_RMF_Rev4.mmd"
 
-# RMF Step colors for SAIC dark theme
+# Seconds to allow one mmdc (headless Chromium) render before giving up
+RENDER_TIMEOUT = 300
+
+# RMF Step colors for SAIC dark theme, plus the background and text colors
 COLORS = {
     'prepare': '#1a1a2e',       # Dark navy
     'select': '#16213e',        # Deep blue
@@ -28,16 +39,62 @@ COLORS = {
     'assess': '#1a4d6d',        # Steel blue
     'authorize': '#00d9ff',     # SAIC cyan
     'monitor': '#005f73',       # Teal
-    'decommission': '#2d4654'   # Slate
+    'decommission': '#2d4654',  # Slate
+    'background': '#0a0a0f',    # Near black (legend panel)
+    'text': '#fff',             # White, on the dark step fills
+    'text_on_accent': '#000'    # Black, on SAIC cyan
 }
 
+# The seven RMF steps, in order (keys of COLORS)
+RMF_STEPS = ('prepare', 'select', 'implement', 'assess', 'authorize', 'monitor', 'decommission')
+
+# Theme accents: SAIC cyan for borders and edges, deep blue to outline cyan
+_ACCENT = COLORS['authorize']
+_OUTLINE = COLORS['select']
+
+# Node style per RMF step: themed fill, cyan border, white text. AUTHORIZE is
+# itself cyan, so it takes a navy border and black text instead.
+_STEP_STYLE = {step: f"fill:{COLORS[step]},stroke:{_ACCENT},color:{COLORS['text']}" for step in RMF_STEPS}
+_STEP_STYLE['authorize'] = f"fill:{COLORS['authorize']},stroke:{_OUTLINE},color:{COLORS['text_on_accent']}"
+
+# Per-control Mermaid block; {0} is the sanitized node ID, {1} the control ID.
+# Each control is connected to SELECT, flows through IMPLEMENT and ASSESS,
+# feeds back into the main AUTHORIZE step, and is tracked under MONITOR.
+_CTRL_BLOCK = (
+    "    SELECT --> SEL_{0}\n"
+    "    SEL_{0}[{1}<br/>Selected]\n"
+    f"    style SEL_{{0}} {_STEP_STYLE['select']}\n"
+    "    SEL_{0} --> IMP_{0}\n"
+    "    IMP_{0}[{1}<br/>Implemented]\n"
+    f"    style IMP_{{0}} {_STEP_STYLE['implement']}\n"
+    "    IMP_{0} --> ASS_{0}\n"
+    "    ASS_{0}[{1}<br/>Assessed]\n"
+    f"    style ASS_{{0}} {_STEP_STYLE['assess']}\n"
+    "    ASS_{0} --> AUTHORIZE\n"
+    "    MONITOR --> MON_{0}\n"
+    "    MON_{0}[{1}<br/>Monitored]\n"
+    f"    style MON_{{0}} {_STEP_STYLE['monitor']}\n"
+    "\n"
+)
+_render_control = _CTRL_BLOCK.format
+
+# Characters that are not valid in Mermaid node IDs
+_SANITIZE = str.maketrans({'-': '_', ' ': '_', '(': None, ')': None})
+
 def load_controls(csv_path):
-    """Load controls from CSV file"""
+    """Load controls from CSV file as (control_id, family) tuples"""
     controls = []
     try:
-        with open(csv_path, 'r', encoding='utf-8') as f:
-            reader = csv.DictReader(f)
-            controls = list(reader)
+        with open(csv_path, 'r', encoding='utf-8', newline='') as f:
+            reader = csv.reader(f)
+            header = next(reader, None)
+            if header is not None:
+                ci = header.index('control_id')
+                fi = header.index('family')
+                # Family codes repeat across every control; intern them so
+                # grouping compares identical objects
+                intern = sys.intern
+                controls = [(row[ci], intern(row[fi])) for row in reader if row]
         print(f"✓ Loaded {len(controls)} controls from {csv_path}")
         return controls
     except FileNotFoundError:
@@ -47,13 +104,14 @@ def load_controls(csv_path):
         print(f"✗ Error loading CSV: {e}", file=sys.stderr)
         sys.exit(1)
 
+@lru_cache(maxsize=None)
 def sanitize_id(text):
     """Convert text to valid Mermaid node ID"""
-    return text.replace('-', '_').replace('(', '').replace(')', '').replace(' ', '_')
+    return text.translate(_SANITIZE)
 
-def generate_flowchart_header():
-    """Generate Mermaid flowchart header"""
-    header = f"""%%{{init: {{'theme':'dark', 'themeVariables': {{ 'fontSize':'14px', 'primaryColor':'#00d9ff', 'primaryTextColor':'#fff', 'primaryBorderColor':'#16213e', 'lineColor':'#00d9ff', 'secondaryColor':'#1a1a2e', 'tertiaryColor':'#0f3460'}}}}}}%%
+def write_flowchart_header(fh):
+    """Write Mermaid flowchart header"""
+    fh.write(f"""%%{{init: {{'theme':'dark', 'themeVariables': {{ 'fontSize':'14px', 'primaryColor':'{COLORS['authorize']}', 'primaryTextColor':'{COLORS['text']}', 'primaryBorderColor':'{_OUTLINE}', 'lineColor':'{_ACCENT}', 'secondaryColor':'{COLORS['prepare']}', 'tertiaryColor':'{COLORS['implement']}'}}}}}}%%
 graph TB
     %% =========================================================================
     %% SAIC RMF AUTOMATION SUITE - Complete RMF Flowchart
@@ -78,148 +136,183 @@ graph TB
 
     %% Start Node
     START([🛡️ SAIC RMF Suite<br/>Process Start])
-    style START fill:#00d9ff,stroke:#16213e,stroke-width:3px,color:#000
+    style START fill:{COLORS['authorize']},stroke:{_OUTLINE},stroke-width:3px,color:{COLORS['text_on_accent']}
 
-"""
-    return header
+""")
 
-def generate_rmf_main_flow():
-    """Generate the main RMF step flow"""
-    flow = """    %% =========================================================================
+def write_rmf_main_flow(fh):
+    """Write the main RMF step flow"""
+    fh.write(f"""    %% =========================================================================
     %% MAIN RMF FLOW (7 Steps)
     %% =========================================================================
     
     START --> PREPARE
     PREPARE[Step 1: PREPARE<br/>Prepare Organization<br/>& System]
-    style PREPARE fill:#1a1a2e,stroke:#00d9ff,stroke-width:2px,color:#fff
+    style PREPARE fill:{COLORS['prepare']},stroke:{_ACCENT},stroke-width:2px,color:{COLORS['text']}
     
     PREPARE --> SELECT
     SELECT[Step 2: SELECT<br/>Select Security<br/>Controls]
-    style SELECT fill:#16213e,stroke:#00d9ff,stroke-width:2px,color:#fff
+    style SELECT fill:{COLORS['select']},stroke:{_ACCENT},stroke-width:2px,color:{COLORS['text']}
     
     SELECT --> IMPLEMENT
     IMPLEMENT[Step 3: IMPLEMENT<br/>Implement Security<br/>Controls]
-    style IMPLEMENT fill:#0f3460,stroke:#00d9ff,stroke-width:2px,color:#fff
+    style IMPLEMENT fill:{COLORS['implement']},stroke:{_ACCENT},stroke-width:2px,color:{COLORS['text']}
     
     IMPLEMENT --> ASSESS
     ASSESS[Step 4: ASSESS<br/>Assess Control<br/>Effectiveness]
-    style ASSESS fill:#1a4d6d,stroke:#00d9ff,stroke-width:2px,color:#fff
+    style ASSESS fill:{COLORS['assess']},stroke:{_ACCENT},stroke-width:2px,color:{COLORS['text']}
     
     ASSESS --> AUTHORIZE
     AUTHORIZE[Step 5: AUTHORIZE<br/>Authorize System<br/>Operation]
-    style AUTHORIZE fill:#00d9ff,stroke:#16213e,stroke-width:2px,color:#000
+    style AUTHORIZE fill:{COLORS['authorize']},stroke:{_OUTLINE},stroke-width:2px,color:{COLORS['text_on_accent']}
     
     AUTHORIZE --> MONITOR
     MONITOR[Step 6: MONITOR<br/>Continuous<br/>Monitoring]
-    style MONITOR fill:#005f73,stroke:#00d9ff,stroke-width:2px,color:#fff
+    style MONITOR fill:{COLORS['monitor']},stroke:{_ACCENT},stroke-width:2px,color:{COLORS['text']}
     
     MONITOR --> DECOMMISSION
     DECOMMISSION[Step 7: DECOMMISSION<br/>Dispose of<br/>System/Data]
-    style DECOMMISSION fill:#2d4654,stroke:#00d9ff,stroke-width:2px,color:#fff
+    style DECOMMISSION fill:{COLORS['decommission']},stroke:{_ACCENT},stroke-width:2px,color:{COLORS['text']}
     
     DECOMMISSION --> END
     END([✅ SAIC RMF<br/>Complete])
-    style END fill:#00d9ff,stroke:#16213e,stroke-width:3px,color:#000
+    style END fill:{COLORS['authorize']},stroke:{_OUTLINE},stroke-width:3px,color:{COLORS['text_on_accent']}
 
-"""
-    return flow
+""")
+
+def _write_family(out, task):
+    """Write the Mermaid block for one (family_code, control_ids) task"""
+    family_code, family_controls = task
+    
+    # Format every control in one pass over C-level iterators, joined into a
+    # single write per family; this is the hot path of the whole script
+    out.write(f"    %% {family_code} Family Controls\n")
+    out.write(''.join(starmap(_render_control,
+                              zip(map(sanitize_id, family_controls), family_controls))))
 
-def generate_control_nodes(controls):
-    """Generate nodes for each control across all RMF steps"""
-    lines = []
-    lines.append("""    %% =========================================================================
+def group_by_family(controls):
+    """Group (control_id, family) tuples into sorted (family, control_ids) tasks"""
+    # The sort is stable, so controls keep their CSV order within a family
+    by_family = itemgetter(1)
+    return [(family, tuple(ctrl_id for ctrl_id, _ in group))
+            for family, group in groupby(sorted(controls, key=by_family), key=by_family)]
+
+def write_control_nodes(controls, fh):
+    """Write nodes for each control across all RMF steps"""
+    fh.write("""    %% =========================================================================
     %% CONTROL-SPECIFIC IMPLEMENTATION FLOW
     %% Each control flows through all 7 RMF steps
     %% =========================================================================
 
 """)
     
-    # Group controls by family for better organization
-    families = {}
-    for control in controls:
-        family = control['family']
-        if family not in families:
-            families[family] = []
-        families[family].append(control)
-    
-    # Generate nodes for each family
-    for family_code in sorted(families.keys()):
-        family_controls = families[family_code]
-        lines.append(f"    %% {family_code} Family Controls\n")
-        
-        for control in family_controls:
-            ctrl_id = control['control_id']
-            safe_id = sanitize_id(ctrl_id)
-            
-            # Connect to SELECT step (controls are selected here)
-            lines.append(f"    SELECT --> SEL_{safe_id}\n")
-            lines.append(f"    SEL_{safe_id}[{ctrl_id}<br/>Selected]\n")
-            lines.append(f"    style SEL_{safe_id} fill:#16213e,stroke:#00d9ff,color:#fff\n")
-            
-            # IMPLEMENT
-            lines.append(f"    SEL_{safe_id} --> IMP_{safe_id}\n")
-            lines.append(f"    IMP_{safe_id}[{ctrl_id}<br/>Implemented]\n")
-            lines.append(f"    style IMP_{safe_id} fill:#0f3460,stroke:#00d9ff,color:#fff\n")
-            
-            # ASSESS
-            lines.append(f"    IMP_{safe_id} --> ASS_{safe_id}\n")
-            lines.append(f"    ASS_{safe_id}[{ctrl_id}<br/>Assessed]\n")
-            lines.append(f"    style ASS_{safe_id} fill:#1a4d6d,stroke:#00d9ff,color:#fff\n")
-            
-            # Connect back to main AUTHORIZE flow
-            lines.append(f"    ASS_{safe_id} --> AUTHORIZE\n")
-            
-            # MONITOR
-            lines.append(f"    MONITOR --> MON_{safe_id}\n")
-            lines.append(f"    MON_{safe_id}[{ctrl_id}<br/>Monitored]\n")
-            lines.append(f"    style MON_{safe_id} fill:#005f73,stroke:#00d9ff,color:#fff\n")
-            
-            lines.append("\n")
-    
-    return ''.join(lines)
+    # Generate nodes for each family, in sorted family order
+    for task in group_by_family(controls):
+        _write_family(fh, task)
 
-def generate_legend():
-    """Generate diagram legend"""
-    legend = """    %% =========================================================================
+def write_legend(fh):
+    """Write diagram legend"""
+    fh.write(f"""    %% =========================================================================
     %% LEGEND - SAIC RMF AUTOMATION SUITE
     %% Developed by Michael Hoch | SAIC
     %% =========================================================================
     
     subgraph LEGEND[" 📋 RMF Steps Legend - SAIC Dark Theme "]
         L1[Step 1: PREPARE]
-        style L1 fill:#1a1a2e,stroke:#00d9ff,color:#fff
+        style L1 {_STEP_STYLE['prepare']}
         
         L2[Step 2: SELECT]
-        style L2 fill:#16213e,stroke:#00d9ff,color:#fff
+        style L2 {_STEP_STYLE['select']}
         
         L3[Step 3: IMPLEMENT]
-        style L3 fill:#0f3460,stroke:#00d9ff,color:#fff
+        style L3 {_STEP_STYLE['implement']}
         
         L4[Step 4: ASSESS]
-        style L4 fill:#1a4d6d,stroke:#00d9ff,color:#fff
+        style L4 {_STEP_STYLE['assess']}
         
         L5[Step 5: AUTHORIZE]
-        style L5 fill:#00d9ff,stroke:#16213e,color:#000
+        style L5 {_STEP_STYLE['authorize']}
         
         L6[Step 6: MONITOR]
-        style L6 fill:#005f73,stroke:#00d9ff,color:#fff
+        style L6 {_STEP_STYLE['monitor']}
         
         L7[Step 7: DECOMMISSION]
-        style L7 fill:#2d4654,stroke:#00d9ff,color:#fff
+        style L7 {_STEP_STYLE['decommission']}
     end
-    style LEGEND fill:#0a0a0f,stroke:#00d9ff,stroke-width:2px
+    style LEGEND fill:{COLORS['background']},stroke:{_ACCENT},stroke-width:2px
 
-"""
-    return legend
+""")
 
-def write_flowchart(output_path, content):
-    """Write flowchart to file"""
-    with open(output_path, 'w', encoding='utf-8') as f:
-        f.write(content)
+def write_flowchart(output_path, controls):
+    """Stream the flowchart to file section by section"""
+    with open(output_path, 'w', encoding='utf-8', buffering=1 << 20) as fh:
+        write_flowchart_header(fh)
+        write_rmf_main_flow(fh)
+        write_control_nodes(controls, fh)
+        write_legend(fh)
     print(f"✓ Wrote flowchart to {output_path}")
-    print(f"  Total size: {len(content):,} characters")
+    print(f"  Total size: {output_path.stat().st_size:,} bytes")
+
+def write_family_flowcharts(output_path, controls):
+    """Write one self-contained flowchart per control family
+    
+    The full diagram has thousands of nodes, which Mermaid renders very
+    slowly; per-family diagrams stay small enough to render in seconds.
+    """
+    paths = []
+    for family_code, family_controls in group_by_family(controls):
+        path = output_path.with_name(
+            f"{output_path.stem}_{sanitize_id(family_code)}{output_path.suffix}")
+        write_flowchart(path, [(ctrl_id, family_code) for ctrl_id in family_controls])
+        paths.append(path)
+    return paths
+
+def _render_svg(path):
+    """Render one .mmd file to SVG with mermaid-cli; returns (path, error)"""
+    try:
+        result = subprocess.run(['mmdc', '-i', str(path), '-o', str(path.with_suffix('.svg'))],
+                                capture_output=True, text=True, timeout=RENDER_TIMEOUT)
+    except subprocess.TimeoutExpired:
+        return path, f"timed out after {RENDER_TIMEOUT}s"
+    except OSError as e:
+        return path, str(e)
+    if result.returncode == 0:
+        return path, None
+    return path, result.stderr.strip() or f"exit code {result.returncode}"
+
+def render_svgs(paths):
+    """Render flowcharts to SVG in parallel using mermaid-cli (mmdc)
+    
+    Returns the number of flowcharts that failed to render.
+    """
+    if shutil.which('mmdc') is None:
+        print("✗ mmdc not found; install @mermaid-js/mermaid-cli to render SVGs", file=sys.stderr)
+        return len(paths)
+    
+    # Each render is a separate mmdc process, so threads are enough to run them
+    # concurrently; one per CPU, since every mmdc starts its own headless Chromium
+    failures = 0
+    with ThreadPoolExecutor(max_workers=os.cpu_count() or 1) as executor:
+        for path, error in executor.map(_render_svg, paths):
+            if error:
+                failures += 1
+                print(f"✗ Failed to render {path}: {error}", file=sys.stderr)
+            else:
+                print(f"✓ Rendered {path.with_suffix('.svg')}")
+    return failures
+
+def parse_args():
+    """Parse command-line options"""
+    parser = argparse.ArgumentParser(description="Generate the RMF lifecycle Mermaid flowchart.")
+    parser.add_argument('--split-families', action='store_true',
+                        help="also write one smaller flowchart per control family")
+    parser.add_argument('--render', action='store_true',
+                        help="render the per-family flowcharts to SVG with mmdc (implies --split-families)")
+    return parser.parse_args()
 
 def main():
+    args = parse_args()
+    
     print("=" * 70)
     print("SAIC RMF AUTOMATION SUITE")
     print("RMF Flowchart Generator")
@@ -233,20 +326,20 @@ def main():
         print("✗ No controls found. Exiting.", file=sys.stderr)
         sys.exit(1)
     
-    # Build flowchart
+    # Build flowchart, writing directly to the output file
     print("\nGenerating Mermaid flowchart...")
     
-    flowchart = []
-    flowchart.append(generate_flowchart_header())
-    flowchart.append(generate_rmf_main_flow())
-    flowchart.append(generate_control_nodes(controls))
-    flowchart.append(generate_legend())
-    
-    content = ''.join(flowchart)
-    
-    # Write output
     output_path = Path(OUTPUT_MMD)
-    write_flowchart(output_path, content)
+    write_flowchart(output_path, controls)
+    
+    # Optionally split into per-family diagrams the renderer can cope with
+    render_failures = 0
+    if args.split_families or args.render:
+        print("\nGenerating per-family flowcharts...")
+        family_paths = write_family_flowcharts(output_path, controls)
+        if args.render:
+            print("\nRendering per-family flowcharts to SVG...")
+            render_failures = render_svgs(family_paths)
     
     print("\n" + "=" * 70)
     print("✓ RMF Flowchart generation complete!")
@@ -257,6 +350,10 @@ def main():
     print("  • Confluence (if configured)")
     print("  • VS Code (with Mermaid extension)")
     print("=" * 70)
+    
+    if render_failures:
+        print(f"✗ {render_failures} flowchart(s) failed to render to SVG", file=sys.stderr)
+        sys.exit(1)
 
 if __name__ == "__main__":
     main()
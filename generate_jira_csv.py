@@ -12,14 +12,24 @@ This allows rapid project setup in Jira with proper RMF task tracking.
 """
 
 import csv
+import io
+import string
 import sys
-from pathlib import Path
+from collections import namedtuple
 from datetime import datetime, timedelta
 
 INPUT_CSV = "controls_rev4.csv"
 OUTPUT_EPICS_CSV = "jira_epics.csv"
 OUTPUT_STORIES_CSV = "jira_stories.csv"
 
+# 1 MiB file buffers: fewer read/write syscalls on large control catalogs.
+# Reading the input through mmap was measured on a ~10 MB catalog and was no
+# faster: csv parsing and record construction dominate, not the read itself.
+IO_BUFFER_SIZE = 1 << 20
+
+# Controls per batch of rows built before each writerows call
+ROW_BATCH_SIZE = 1000
+
 # Jira issue type mappings
 ISSUE_TYPE_EPIC = "Epic"
 ISSUE_TYPE_STORY = "Story"
@@ -29,6 +39,18 @@ PRIORITY_HIGH = "High"
 PRIORITY_MEDIUM = "Medium"
 PRIORITY_LOW = "Low"
 
+# Jira CSV columns, and the row records written under them (same order;
+# the record fields are identifier-safe versions of the column headers)
+EPIC_FIELDS = ['Issue Type', 'Summary', 'Description', 'Priority', 'Epic Name', 'Labels', 'Component/s']
+STORY_FIELDS = ['Issue Type', 'Summary', 'Description', 'Priority', 'Story Points', 'Epic Link', 'Labels', 'Component/s']
+EpicRow = namedtuple('EpicRow', 'issue_type summary description priority epic_name labels components')
+StoryRow = namedtuple('StoryRow', 'issue_type summary description priority story_points epic_link labels components')
+
+# Header lines are written verbatim; no column name needs CSV quoting, and
+# '\r\n' matches csv.writer's default line terminator
+EPIC_HEADER_LINE = ','.join(EPIC_FIELDS) + '\r\n'
+STORY_HEADER_LINE = ','.join(STORY_FIELDS) + '\r\n'
+
 # Story point estimates
 STORY_POINTS = {
     'implement': 8,
@@ -36,72 +58,20 @@ STORY_POINTS = {
     'verify': 3
 }
 
-def load_controls(csv_path):
-    """Load controls from CSV file"""
-    controls = []
-    try:
-        with open(csv_path, 'r', encoding='utf-8') as f:
-            reader = csv.DictReader(f)
-            controls = list(reader)
-        print(f"✓ Loaded {len(controls)} controls from {csv_path}")
-        return controls
-    except FileNotFoundError:
-        print(f"✗ Error: {csv_path} not found. Run fetch_cci_mapping.py first.", file=sys.stderr)
-        sys.exit(1)
-    except Exception as e:
-        print(f"✗ Error loading CSV: {e}", file=sys.stderr)
-        sys.exit(1)
+# Control IDs appear in labels with dashes turned into underscores
+_DASH_TO_UNDERSCORE = str.maketrans('-', '_')
 
-def get_priority_by_family(family):
-    """Determine priority based on control family"""
-    high_priority = ['AC', 'AU', 'IA', 'SC', 'SI']  # Critical security families
-    medium_priority = ['CM', 'CP', 'IR', 'RA', 'CA']
-    
-    if family in high_priority:
-        return PRIORITY_HIGH
-    elif family in medium_priority:
-        return PRIORITY_MEDIUM
-    else:
-        return PRIORITY_LOW
+# Story label prefixes; the underscored control ID is appended per control
+STORY_IMPL_LABELS = "RMF,Step3-Implement,"
+STORY_ASSESS_LABELS = "RMF,Step4-Assess,"
+STORY_VERIFY_LABELS = "RMF,Step5-Authorize,"
 
-def get_family_name(family_code):
-    """Get full family name from code"""
-    families = {
-        'AC': 'Access Control',
-        'AU': 'Audit and Accountability',
-        'AT': 'Awareness and Training',
-        'CM': 'Configuration Management',
-        'CP': 'Contingency Planning',
-        'IA': 'Identification and Authentication',
-        'IR': 'Incident Response',
-        'MA': 'Maintenance',
-        'MP': 'Media Protection',
-        'PS': 'Personnel Security',
-        'PE': 'Physical and Environmental Protection',
-        'PL': 'Planning',
-        'PM': 'Program Management',
-        'RA': 'Risk Assessment',
-        'CA': 'Security Assessment and Authorization',
-        'SC': 'System and Communications Protection',
-        'SI': 'System and Information Integrity',
-        'SA': 'System and Services Acquisition'
-    }
-    return families.get(family_code, 'Other')
-
-def generate_epics(controls):
-    """Generate Epic CSV for Jira import"""
-    epics = []
-    
-    for control in controls:
-        ctrl_id = control['control_id']
-        family = control['family']
-        family_name = get_family_name(family)
-        priority = get_priority_by_family(family)
-        
-        epic = {
-            'Issue Type': ISSUE_TYPE_EPIC,
-            'Summary': f"[{ctrl_id}] {family_name}",
-            'Description': f"""# NIST 800-53 Rev 4 Control: {ctrl_id}
+# Description templates. They are split into literal pieces at import time
+# (see below) and joined around each control's values, which is much cheaper
+# than re-running str.format per row.
+
+# Epic description template
+EPIC_DESC_TMPL = """# NIST 800-53 Rev 4 Control: {ctrl_id}
 
 **Control Family:** {family_name}
 
@@ -112,40 +82,17 @@ def generate_epics(controls):
 4. 🔄 AUTHORIZE - Document and approve
 5. 🔄 MONITOR - Continuous assessment
 
-**CCIs Mapped:** {control.get('cci_count', 'N/A')}
+**CCIs Mapped:** {cci_count}
 
-**Sample Text:** {control.get('sample_text', 'No description available')}
+**Sample Text:** {sample_text}
 
 ---
 *This Epic tracks the complete RMF lifecycle for control {ctrl_id}.*
 *Create child Stories for Implementation, Assessment, and Verification tasks.*
-""",
-            'Priority': priority,
-            'Epic Name': f"{ctrl_id}",
-            'Labels': f"RMF,NIST-800-53,{family},{ctrl_id.replace('-', '_')}",
-            'Component/s': family_name
-        }
-        
-        epics.append(epic)
-    
-    return epics
+"""
 
-def generate_stories(controls):
-    """Generate Story CSV for Jira import"""
-    stories = []
-    
-    for control in controls:
-        ctrl_id = control['control_id']
-        family = control['family']
-        family_name = get_family_name(family)
-        priority = get_priority_by_family(family)
-        epic_name = ctrl_id
-        
-        # Story 1: Implementation
-        stories.append({
-            'Issue Type': ISSUE_TYPE_STORY,
-            'Summary': f"[{ctrl_id}] Implement Control Requirements",
-            'Description': f"""# Implementation Task for {ctrl_id}
+# Story 1: Implementation template
+STORY_IMPL_DESC_TMPL = """# Implementation Task for {ctrl_id}
 
 **Objective:** Implement all technical and procedural requirements for {ctrl_id}.
 
@@ -164,19 +111,10 @@ def generate_stories(controls):
 - SSP is updated with implementation details
 
 ## RMF Step: 3 - IMPLEMENT
-""",
-            'Priority': priority,
-            'Story Points': STORY_POINTS['implement'],
-            'Epic Link': epic_name,
-            'Labels': f"RMF,Step3-Implement,{ctrl_id.replace('-', '_')}",
-            'Component/s': family_name
-        })
-        
-        # Story 2: Assessment
-        stories.append({
-            'Issue Type': ISSUE_TYPE_STORY,
-            'Summary': f"[{ctrl_id}] Assess Control Effectiveness",
-            'Description': f"""# Assessment Task for {ctrl_id}
+"""
+
+# Story 2: Assessment template
+STORY_ASSESS_DESC_TMPL = """# Assessment Task for {ctrl_id}
 
 **Objective:** Test and validate the effectiveness of control {ctrl_id}.
 
@@ -196,19 +134,10 @@ def generate_stories(controls):
 - Any deficiencies are tracked
 
 ## RMF Step: 4 - ASSESS
-""",
-            'Priority': priority,
-            'Story Points': STORY_POINTS['assess'],
-            'Epic Link': epic_name,
-            'Labels': f"RMF,Step4-Assess,{ctrl_id.replace('-', '_')}",
-            'Component/s': family_name
-        })
-        
-        # Story 3: Verification & Documentation
-        stories.append({
-            'Issue Type': ISSUE_TYPE_STORY,
-            'Summary': f"[{ctrl_id}] Verify and Document Control",
-            'Description': f"""# Verification Task for {ctrl_id}
+"""
+
+# Story 3: Verification & Documentation template
+STORY_VERIFY_DESC_TMPL = """# Verification Task for {ctrl_id}
 
 **Objective:** Verify control implementation and complete authorization documentation.
 
@@ -227,26 +156,216 @@ def generate_stories(controls):
 - Authorization package is complete
 
 ## RMF Step: 5 - AUTHORIZE
-""",
-            'Priority': priority,
-            'Story Points': STORY_POINTS['verify'],
-            'Epic Link': epic_name,
-            'Labels': f"RMF,Step5-Authorize,{ctrl_id.replace('-', '_')}",
-            'Component/s': family_name
-        })
+"""
+
+# One row of controls_rev4.csv
+Control = namedtuple('Control', 'control_id family cci_count sample_text')
+
+def _template_pieces(template, fields):
+    """Split a str.format template into the literal text around its fields
+    
+    Returns len(fields) + 1 pieces; raises ValueError if the template's
+    fields are not exactly `fields`, in order.
+    """
+    parsed = list(string.Formatter().parse(template))
+    if parsed and parsed[-1][1] is not None:
+        parsed.append(('', None, None, None))
+    found = tuple(field for _, field, _, _ in parsed[:-1])
+    if found != tuple(fields):
+        raise ValueError(f"template fields {found} do not match {tuple(fields)}")
+    return tuple(literal for literal, _, _, _ in parsed)
+
+(_EPIC_DESC_0, _EPIC_DESC_1, _EPIC_DESC_2, _EPIC_DESC_3, _EPIC_DESC_4, _EPIC_DESC_5) = _template_pieces(
+    EPIC_DESC_TMPL, ('ctrl_id', 'family_name', 'cci_count', 'sample_text', 'ctrl_id'))
+# One entry per Story created for each control:
+# (summary suffix, description pieces, story points, label prefix).
+# Story descriptions only reference {ctrl_id}, so each is ctrl_id.join(pieces).
+STORY_SPECS = (
+    # Story 1: Implementation
+    ('Implement Control Requirements',
+     _template_pieces(STORY_IMPL_DESC_TMPL, ('ctrl_id',) * 2),
+     STORY_POINTS['implement'], STORY_IMPL_LABELS),
+    # Story 2: Assessment
+    ('Assess Control Effectiveness',
+     _template_pieces(STORY_ASSESS_DESC_TMPL, ('ctrl_id',) * 2),
+     STORY_POINTS['assess'], STORY_ASSESS_LABELS),
+    # Story 3: Verification & Documentation
+    ('Verify and Document Control',
+     _template_pieces(STORY_VERIFY_DESC_TMPL, ('ctrl_id',)),
+     STORY_POINTS['verify'], STORY_VERIFY_LABELS)
+)
+
+def load_controls(csv_path):
+    """Load controls from CSV file as Control records"""
+    controls = []
+    try:
+        with open(csv_path, 'r', encoding='utf-8', newline='', buffering=IO_BUFFER_SIZE) as f:
+            reader = csv.reader(f)
+            header = next(reader, None)
+            if header is not None:
+                idx = {name: i for i, name in enumerate(header)}
+                ci, fi = idx['control_id'], idx['family']
+                cci_i, text_i = idx.get('cci_count'), idx.get('sample_text')
+                # Optional columns fall back to defaults when absent from the
+                # header or from a short row
+                controls = [
+                    Control(row[ci], row[fi],
+                            row[cci_i] if cci_i is not None and cci_i < len(row) else 'N/A',
+                            row[text_i] if text_i is not None and text_i < len(row) else 'No description available')
+                    for row in reader if row
+                ]
+        print(f"✓ Loaded {len(controls)} controls from {csv_path}")
+        return controls
+    except FileNotFoundError:
+        print(f"✗ Error: {csv_path} not found. Run fetch_cci_mapping.py first.", file=sys.stderr)
+        sys.exit(1)
+    except Exception as e:
+        print(f"✗ Error loading CSV: {e}", file=sys.stderr)
+        sys.exit(1)
+
+# Critical security families get high priority, supporting families medium
+HIGH_PRIORITY_FAMILIES = frozenset({'AC', 'AU', 'IA', 'SC', 'SI'})
+MEDIUM_PRIORITY_FAMILIES = frozenset({'CM', 'CP', 'IR', 'RA', 'CA'})
+
+# NIST 800-53 control family names
+FAMILY_NAMES = {
+    'AC': 'Access Control',
+    'AU': 'Audit and Accountability',
+    'AT': 'Awareness and Training',
+    'CM': 'Configuration Management',
+    'CP': 'Contingency Planning',
+    'IA': 'Identification and Authentication',
+    'IR': 'Incident Response',
+    'MA': 'Maintenance',
+    'MP': 'Media Protection',
+    'PS': 'Personnel Security',
+    'PE': 'Physical and Environmental Protection',
+    'PL': 'Planning',
+    'PM': 'Program Management',
+    'RA': 'Risk Assessment',
+    'CA': 'Security Assessment and Authorization',
+    'SC': 'System and Communications Protection',
+    'SI': 'System and Information Integrity',
+    'SA': 'System and Services Acquisition'
+}
+
+def get_priority_by_family(family):
+    """Determine priority based on control family"""
+    if family in HIGH_PRIORITY_FAMILIES:
+        return PRIORITY_HIGH
+    elif family in MEDIUM_PRIORITY_FAMILIES:
+        return PRIORITY_MEDIUM
+    else:
+        return PRIORITY_LOW
+
+def get_family_name(family_code):
+    """Get full family name from code"""
+    return FAMILY_NAMES.get(family_code, 'Other')
+
+def get_family_info(family, cache):
+    """Return (family_name, priority, epic_label_prefix) for a family, memoized in cache"""
+    info = cache.get(family)
+    if info is None:
+        info = cache[family] = (get_family_name(family), get_priority_by_family(family),
+                                f"RMF,NIST-800-53,{family},")
+    return info
+
+def build_epic_row(control, family_name, priority, labels):
+    """Build the EpicRow for a control"""
+    ctrl_id, _, cci_count, sample_text = control
+    description = ''.join((
+        _EPIC_DESC_0, ctrl_id, _EPIC_DESC_1, family_name, _EPIC_DESC_2, cci_count,
+        _EPIC_DESC_3, sample_text, _EPIC_DESC_4, ctrl_id, _EPIC_DESC_5
+    ))
+    return EpicRow(
+        ISSUE_TYPE_EPIC,
+        f"[{ctrl_id}] {family_name}",
+        description,
+        priority,
+        ctrl_id,
+        labels,
+        family_name
+    )
+
+def build_story_rows(ctrl_id, ctrl_id_u, family_name, priority):
+    """Build the StoryRows for a control, one per STORY_SPECS entry"""
+    summary_prefix = f"[{ctrl_id}] "
+    return [
+        StoryRow(
+            ISSUE_TYPE_STORY,
+            summary_prefix + summary,
+            ctrl_id.join(pieces),
+            priority,
+            points,
+            ctrl_id,            # Epic Link: the parent Epic's name
+            labels + ctrl_id_u,
+            family_name
+        )
+        for summary, pieces, points, labels in STORY_SPECS
+    ]
+
+def open_csv(filename):
+    """Open a CSV file for writing
+    
+    The text layer sits on an explicit 1 MiB BufferedWriter with line
+    buffering and write-through off, so rows are never flushed individually;
+    the buffer is flushed once when the file is closed.
+    """
+    raw = open(filename, 'wb', buffering=IO_BUFFER_SIZE)
+    return io.TextIOWrapper(raw, encoding='utf-8', newline='',
+                            line_buffering=False, write_through=False)
+
+def build_rows(controls, family_info):
+    """Build the Epic and Story rows for a batch of controls
+    
+    This is the CPU-bound core of the script: it does no I/O and touches only
+    the Control records and the family_info memo, returning
+    (epic_rows, story_rows).
+    """
+    epic_rows = []
+    story_rows = []
+    add_epic = epic_rows.append
+    add_stories = story_rows.extend
     
-    return stories
+    for control in controls:
+        # Values shared by the Epic and its Stories are computed once
+        ctrl_id, family = control.control_id, control.family
+        family_name, priority, label_prefix = get_family_info(family, family_info)
+        ctrl_id_u = ctrl_id.translate(_DASH_TO_UNDERSCORE)
+        
+        add_epic(build_epic_row(control, family_name, priority, label_prefix + ctrl_id_u))
+        add_stories(build_story_rows(ctrl_id, ctrl_id_u, family_name, priority))
+    
+    return epic_rows, story_rows
 
-def write_csv(filename, data, fieldnames):
-    """Write data to CSV file"""
-    output_path = Path(filename)
+def write_jira_csvs(controls):
+    """Write the Epic and Story CSVs in a single pass over the controls
+    
+    Rows are built in batches of ROW_BATCH_SIZE controls and handed to
+    writerows, so the rows held in memory are bounded by one batch.
+    Returns (epic_count, story_count).
+    """
+    epic_count = story_count = 0
+    family_info = {}
     
-    with open(output_path, 'w', newline='', encoding='utf-8') as f:
-        writer = csv.DictWriter(f, fieldnames=fieldnames)
-        writer.writeheader()
-        writer.writerows(data)
+    with open_csv(OUTPUT_EPICS_CSV) as epic_file, open_csv(OUTPUT_STORIES_CSV) as story_file:
+        epic_file.write(EPIC_HEADER_LINE)
+        story_file.write(STORY_HEADER_LINE)
+        # QUOTE_MINIMAL measured slightly faster than QUOTE_ALL here (and its
+        # output is smaller), even though every multi-line Description needs quoting
+        epic_writer = csv.writer(epic_file, quoting=csv.QUOTE_MINIMAL)
+        story_writer = csv.writer(story_file, quoting=csv.QUOTE_MINIMAL)
+        
+        for start in range(0, len(controls), ROW_BATCH_SIZE):
+            epic_rows, story_rows = build_rows(controls[start:start + ROW_BATCH_SIZE], family_info)
+            epic_writer.writerows(epic_rows)
+            story_writer.writerows(story_rows)
+            epic_count += len(epic_rows)
+            story_count += len(story_rows)
     
-    print(f"✓ Wrote {len(data)} items to {output_path}")
+    print(f"✓ Wrote {epic_count} items to {OUTPUT_EPICS_CSV}")
+    print(f"✓ Wrote {story_count} items to {OUTPUT_STORIES_CSV}")
+    return epic_count, story_count
 
 def main():
     print("=" * 70)
@@ -262,22 +381,14 @@ def main():
         print("✗ No controls found. Exiting.", file=sys.stderr)
         sys.exit(1)
     
-    # Generate Epics
-    print("\nGenerating Epics...")
-    epics = generate_epics(controls)
-    epic_fields = ['Issue Type', 'Summary', 'Description', 'Priority', 'Epic Name', 'Labels', 'Component/s']
-    write_csv(OUTPUT_EPICS_CSV, epics, epic_fields)
-    
-    # Generate Stories
-    print("\nGenerating Stories...")
-    stories = generate_stories(controls)
-    story_fields = ['Issue Type', 'Summary', 'Description', 'Priority', 'Story Points', 'Epic Link', 'Labels', 'Component/s']
-    write_csv(OUTPUT_STORIES_CSV, stories, story_fields)
+    # Generate Epics and Stories together
+    print("\nGenerating Epics and Stories...")
+    epic_count, story_count = write_jira_csvs(controls)
     
     print("\n" + "=" * 70)
     print("✓ Jira CSV generation complete!")
-    print(f"  Epics created: {len(epics)}")
-    print(f"  Stories created: {len(stories)}")
+    print(f"  Epics created: {epic_count}")
+    print(f"  Stories created: {story_count}")
     print(f"\nImport files:")
     print(f"  1. {OUTPUT_EPICS_CSV} (import first)")
     print(f"  2. {OUTPUT_STORIES_CSV} (import after Epics)")